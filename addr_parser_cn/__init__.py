@@ -0,0 +1,3 @@
+from .addr_parser_cn import AdvancedAddressParser
+
+__all__ = ['AdvancedAddressParser']
@@ -0,0 +1,875 @@
+import sqlite3
+import os
+import re
+import json
+import multiprocessing
+import pickle
+import tempfile
+from contextlib import closing
+from functools import lru_cache
+import unicodedata
+from collections import Counter, namedtuple
+import ahocorasick
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    # 未安装tqdm时不显示进度条
+    class tqdm:
+        def __init__(self, iterable=None, **kwargs):
+            self.iterable = iterable
+        
+        def __iter__(self):
+            return iter(self.iterable)
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc_info):
+            return False
+        
+        def update(self, n=1):
+            pass
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    # RE2为DFA引擎，线性时间匹配；未安装时退回标准库re
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
+
+
+# RE2的\s只匹配ASCII空白，显式列出标准库re的\s额外覆盖的空白字符，保证两种引擎结果一致
+_EXTRA_WHITESPACE = '\x0b\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000'
+
+# 地址清洗用正则，模块加载时编译一次
+# 括号内容与分隔符合并为一个模式，一次扫描完成移除
+_RE_CLEAN = _re_engine.compile(r'[（(【\[].*?[】)\]）]|[-－—_=\s' + _EXTRA_WHITESPACE + r'/]+')
+_RE_ADMIN_UNIT = _re_engine.compile(r'.*?市|.*?区|.*?县')
+_RE_PROV_ALIAS = re.compile(r'省|市|自治区|特别行政区|壮族|回族|维吾尔|蒙古')
+
+# 每个解析器实例缓存的parse()结果条数
+_PARSE_CACHE_SIZE = 100000
+
+# 索引缓存文件格式版本，索引结构变化时递增以废弃旧缓存
+_INDEX_CACHE_VERSION = 3
+
+# 行政区划记录，parent为上级行政区划代码（省份为None）
+Region = namedtuple('Region', 'code name lng lat parent')
+
+
+class AddressTrie:
+    """地址前缀树，用于快速匹配地址组件"""
+    def __init__(self):
+        self.root = {}
+        self.is_end = "_end_"
+    
+    def insert(self, word, data):
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[self.is_end] = data
+    
+    def search_all_matches(self, text):
+        matches = []
+        root, is_end = self.root, self.is_end
+        for i in range(len(text)):
+            # 从每个起点沿树单次下行，一次字典查找推进一个字符
+            node = root
+            for j in range(i, len(text)):
+                node = node.get(text[j])
+                if node is None:
+                    break
+                if is_end in node:
+                    matches.append({
+                        'text': text[i:j+1],
+                        'data': node[is_end]
+                    })
+        return matches
+
+
+class AdvancedAddressParser:
+    """高级地址解析器，使用多种策略提升解析准确率"""
+    
+    # 由数据库构建、可持久化到索引缓存文件的属性
+    _INDEX_ATTRS = (
+        'province_alias_map', 'all_provinces', 'all_cities', 'all_prov_names',
+        'prov_automaton', 'prov_by_name', 'prov_by_code',
+        'city_by_prov_and_name', 'district_by_city_and_name',
+        'city_to_districts_map', 'city_code_to_province_code_map', 'city_to_province',
+        'trie', 'code_to_entity', 'dist_to_city_prov',
+    )
+    
+    def __init__(self, data_dir=None):
+        """
+        初始化解析器
+        
+        Args:
+            data_dir: 数据目录路径，默认在包的安装路径下
+        """
+        self._init_paths(data_dir)
+        
+        print("正在初始化高级地址解析器...")
+        self._check_aliyun_db()
+        if not self._load_index_cache():
+            self._load_all_data()
+            self._save_index_cache()
+        self._init_parsers()
+        self._parse_cached = lru_cache(maxsize=_PARSE_CACHE_SIZE)(self._parse_impl)
+        print("解析器初始化完成。")
+    
+    def __getstate__(self):
+        # 缓存包装器无法序列化，在子进程中重建
+        state = self.__dict__.copy()
+        del state['_parse_cached']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._parse_cached = lru_cache(maxsize=_PARSE_CACHE_SIZE)(self._parse_impl)
+    
+    @classmethod
+    def build_database(cls, data_dir=None):
+        """
+        下载阿里云数据并构建SQLite数据库
+        
+        需要安装build扩展依赖：pip install addr_parser_cn[build]
+        
+        Args:
+            data_dir: 数据目录路径，默认在包的安装路径下
+            
+        Returns:
+            str: 生成的数据库路径
+        """
+        builder = cls.__new__(cls)
+        builder._init_paths(data_dir)
+        os.makedirs(builder.data_dir, exist_ok=True)
+        if not os.path.exists(builder.aliyun_raw_path):
+            builder._download_raw_data()
+        builder._create_sqlite_from_json()
+        return builder.aliyun_db_path
+    
+    def _init_paths(self, data_dir):
+        """设置数据目录及其中各数据文件的路径"""
+        if data_dir:
+            self.data_dir = data_dir
+        else:
+            self.data_dir = os.path.join(os.path.dirname(__file__), 'data')
+        
+        self.aliyun_db_path = os.path.join(self.data_dir, 'aliyun_regions.sqlite')
+        self.aliyun_raw_path = os.path.join(self.data_dir, 'aliyun_raw_data.json')
+        self.index_cache_path = os.path.join(self.data_dir, 'aliyun_indexes.pkl')
+    
+    def _check_aliyun_db(self):
+        """检查权威数据库是否存在，运行时不再自动下载构建"""
+        if not os.path.exists(self.aliyun_db_path):
+            raise FileNotFoundError(
+                f"错误: 未找到权威数据库 '{self.aliyun_db_path}'，"
+                f"请重新安装addr_parser_cn，或调用 AdvancedAddressParser.build_database() 构建")
+    
+    def _load_index_cache(self):
+        """从索引缓存文件加载数据索引，缓存缺失或过期时返回False"""
+        if not os.path.exists(self.index_cache_path):
+            return False
+        if os.path.getmtime(self.index_cache_path) < os.path.getmtime(self.aliyun_db_path):
+            return False
+        
+        try:
+            with open(self.index_cache_path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            return False
+        
+        if state.get('version') != _INDEX_CACHE_VERSION:
+            return False
+        
+        print("正在从缓存加载数据索引...")
+        for name in self._INDEX_ATTRS:
+            setattr(self, name, state[name])
+        return True
+    
+    def _save_index_cache(self):
+        """将数据索引写入缓存文件，目录不可写时跳过，写入失败不影响解析"""
+        # 默认数据目录位于site-packages，通常只读
+        if not os.access(self.data_dir, os.W_OK):
+            return
+        
+        state = {name: getattr(self, name) for name in self._INDEX_ATTRS}
+        state['version'] = _INDEX_CACHE_VERSION
+        tmp_path = None
+        try:
+            # 每个进程使用各自的临时文件，避免并发写入时互相覆盖
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.data_dir)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.index_cache_path)
+        except (OSError, pickle.PicklingError) as e:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"警告: 写入索引缓存失败: {e}")
+    
+    def _download_raw_data(self):
+        """从阿里云下载地理数据"""
+        import requests
+        
+        print("正在从阿里云下载地理数据...")
+        full_data_url = "https://geo.datav.aliyun.com/areas_v3/bound/all.json"
+        # 响应体分块直接写入临时文件，下载完整后再替换，避免残留不完整的原始数据
+        tmp_path = self.aliyun_raw_path + '.tmp'
+        try:
+            with requests.get(full_data_url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+            os.replace(tmp_path, self.aliyun_raw_path)
+            print("原始数据下载完成。")
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise RuntimeError(f"错误: 下载阿里云数据失败: {e}")
+    
+    def _create_sqlite_from_json(self):
+        """从JSON创建SQLite数据库"""
+        print(f"正在从 '{self.aliyun_raw_path}' 创建SQLite数据库...")
+        with open(self.aliyun_raw_path, 'rb') as f:
+            loaded_data = _json_loads(f.read())
+        
+        features = loaded_data.get('features', []) if isinstance(loaded_data, dict) else loaded_data
+        
+        # 按层级直接分组为待插入的行，不经过DataFrame
+        provinces, cities, districts = [], [], []
+        for feat in tqdm(features, desc="处理JSON数据"):
+            region = self._process_feature(feat)
+            if region is None:
+                continue
+            row = (region['code'], region['name'], region['longitude'], region['latitude'])
+            if region['level'] == 'province':
+                provinces.append(row)
+            elif region['level'] == 'city':
+                cities.append(row + (region['parentCode'],))
+            elif region['level'] == 'district':
+                districts.append(row + (region['parentCode'],))
+        
+        # 创建城市到省份的映射，直辖市的区县直接挂在省级代码下
+        city_to_prov_map = {code: prov_code for code, _, _, _, prov_code in cities}
+        city_to_prov_map.update((code, code) for code, name, _, _ in provinces if name.endswith('市'))
+        districts = [row + (city_to_prov_map.get(row[4]),) for row in districts]
+        
+        with closing(self._connect()) as con, con:
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.executescript("""
+                DROP TABLE IF EXISTS provinces;
+                DROP TABLE IF EXISTS cities;
+                DROP TABLE IF EXISTS districts;
+                CREATE TABLE provinces (
+                    code TEXT, name TEXT, longitude REAL, latitude REAL);
+                CREATE TABLE cities (
+                    code TEXT, name TEXT, longitude REAL, latitude REAL, provinceCode TEXT);
+                CREATE TABLE districts (
+                    code TEXT, name TEXT, longitude REAL, latitude REAL, cityCode TEXT, provinceCode TEXT);
+            """)
+            con.executemany("INSERT INTO provinces VALUES (?, ?, ?, ?)", provinces)
+            con.executemany("INSERT INTO cities VALUES (?, ?, ?, ?, ?)", cities)
+            con.executemany("INSERT INTO districts VALUES (?, ?, ?, ?, ?, ?)", districts)
+            con.executescript("""
+                CREATE INDEX idx_provinces_name ON provinces(name);
+                CREATE INDEX idx_cities_name ON cities(name);
+                CREATE INDEX idx_cities_province ON cities(provinceCode);
+                CREATE INDEX idx_districts_name ON districts(name);
+                CREATE INDEX idx_districts_city ON districts(cityCode);
+            """)
+        
+        print("权威数据库创建成功。")
+    
+    def _connect(self):
+        """
+        打开数据库连接，启用内存映射读取并加大页缓存
+        
+        连接作为上下文管理器只负责提交事务，调用方需用closing()关闭连接。
+        """
+        con = sqlite3.connect(self.aliyun_db_path)
+        con.execute("PRAGMA mmap_size=268435456")
+        con.execute("PRAGMA cache_size=-20000")
+        return con
+    
+    def _process_feature(self, feature):
+        """处理GeoJSON特征"""
+        properties = feature.get('properties', {}) if 'properties' in feature else feature
+        if not properties or not properties.get('adcode'):
+            return None
+        
+        adcode = str(properties['adcode'])
+        center = properties.get('center')
+        longitude, latitude = (center[0], center[1]) if center and len(center) == 2 else (
+            properties.get('lng'), properties.get('lat'))
+        
+        parent = properties.get('parent')
+        parent_adcode = str(parent.get('adcode', '')) if isinstance(parent, dict) else str(parent or '')
+        
+        return {
+            'code': adcode,
+            'name': properties.get('name'),
+            'level': properties.get('level'),
+            'longitude': longitude,
+            'latitude': latitude,
+            'parentCode': parent_adcode
+        }
+    
+    def _load_all_data(self):
+        """加载所有数据到内存"""
+        print("正在加载解析所需的数据索引...")
+        with closing(self._connect()) as con, con:
+            provinces = [Region._make(r) for r in con.execute(
+                "SELECT code, name, longitude, latitude, NULL FROM provinces")]
+            cities = [Region._make(r) for r in con.execute(
+                "SELECT code, name, longitude, latitude, provinceCode FROM cities")]
+            districts = [Region._make(r) for r in con.execute(
+                "SELECT code, name, longitude, latitude, cityCode FROM districts")]
+        
+        # 创建省份别名映射
+        names = [r.name for r in provinces]
+        # 创建简称映射
+        aliases = [_RE_PROV_ALIAS.sub('', name) for name in names]
+        self.province_alias_map = dict(zip(names, names))
+        self.province_alias_map.update({
+            alias: full_name for alias, full_name in zip(aliases, names) if alias and alias != full_name
+        })
+        
+        self.all_provinces = sorted(list(self.province_alias_map.keys()), key=len, reverse=True)
+        self.all_cities = sorted(dict.fromkeys(r.name for r in cities), key=len, reverse=True)
+        self.all_prov_names = set(names)
+        
+        # 建立名称/代码到记录的字典索引，解析时直接查表
+        self.prov_by_name = {}
+        self.prov_by_code = {}
+        for row in provinces:
+            self.prov_by_name.setdefault(row.name, row)
+            self.prov_by_code.setdefault(row.code, row)
+        self.city_by_prov_and_name = {}
+        for row in cities:
+            self.city_by_prov_and_name.setdefault((row.parent, row.name), row)
+        self.district_by_city_and_name = {}
+        city_to_districts = {}
+        for row in districts:
+            self.district_by_city_and_name.setdefault((row.parent, row.name), row)
+            if row.parent is not None:
+                city_to_districts.setdefault(row.parent, []).append(row.name)
+        
+        # 创建省份全称的AC自动机，一次扫描即可找出地址中出现的所有省份
+        self.prov_automaton = ahocorasick.Automaton()
+        for prov in self.all_prov_names:
+            self.prov_automaton.add_word(prov, prov)
+        self.prov_automaton.make_automaton()
+        
+        # 创建城市到区县的映射，按名称长度降序
+        self.city_to_districts_map = {
+            code: sorted(dists, key=len, reverse=True) for code, dists in city_to_districts.items()
+        }
+        
+        # 创建城市代码到省代码的映射
+        self.city_code_to_province_code_map = {r.code: r.parent for r in cities}
+        
+        # 创建城市名到省名的映射
+        self.city_to_province = {
+            r.name: self.prov_by_code[r.parent].name
+            for r in cities
+            if r.parent in self.prov_by_code
+        }
+        self.city_to_province.update({
+            n[:-1]: p for n, p in self.city_to_province.items() if n.endswith('市')
+        })
+        
+        self._init_trie(provinces, cities, districts)
+    
+    def _init_parsers(self):
+        """初始化各种解析器"""
+        # 初始化正则解析器
+        self.province_patterns = [
+            re.compile(r'([^市县区岛]*?(?:省|自治区|特别行政区))'),
+            re.compile(r'(北京|上海|天津|重庆)(?=市|$)'),
+            re.compile(r'(内蒙古|广西|西藏|宁夏|新疆)(?=自治区|$|市|区|县)'),
+            re.compile(r'(香港|澳门)(?=特别行政区|$)')
+        ]
+        self.city_patterns = [
+            re.compile(r'([^省市区县]*?(?:市|地区|州|盟))(?![辖区])'),
+            re.compile(r'([^省市区县]*?(?:自治州))')
+        ]
+        self.district_patterns = [
+            re.compile(r'([^省市街道乡镇]*?(?:区|县|县级市|自治县|旗|林区|特区))(?![级])')
+        ]
+        
+        self.address_mappings = {
+            '北京': '北京市', '上海': '上海市', '天津': '天津市', '重庆': '重庆市',
+            '内蒙': '内蒙古自治区', '广西': '广西壮族自治区',
+            '西藏': '西藏自治区', '宁夏': '宁夏回族自治区',
+            '新疆': '新疆维吾尔自治区', '香港': '香港特别行政区', '澳门': '澳门特别行政区'
+        }
+        self.municipalities = {'北京市', '上海市', '天津市', '重庆市'}
+    
+    def _init_trie(self, provinces, cities, districts):
+        """初始化Trie树用于智能匹配"""
+        self.trie = AddressTrie()
+        self.code_to_entity = {}
+        self.dist_to_city_prov = {}
+        
+        city_to_prov_code = self.city_code_to_province_code_map
+        
+        # 插入省份
+        for row in provinces:
+            data = {
+                'code': row.code,
+                'level': 'province',
+                'name': row.name
+            }
+            self.trie.insert(row.name, data)
+            self.code_to_entity[row.code] = data
+            if row.name.endswith('省'):
+                self.trie.insert(row.name[:-1], data)
+        
+        # 插入城市
+        for row in cities:
+            data = {
+                'code': row.code,
+                'level': 'city',
+                'name': row.name,
+                'parent_code': row.parent
+            }
+            self.trie.insert(row.name, data)
+            self.code_to_entity[row.code] = data
+            if row.name.endswith('市'):
+                self.trie.insert(row.name[:-1], data)
+        
+        # 插入区县
+        for row in districts:
+            prov_code = city_to_prov_code.get(row.parent)
+            data = {
+                'code': row.code,
+                'level': 'district',
+                'name': row.name,
+                'parent_code': row.parent
+            }
+            self.trie.insert(row.name, data)
+            self.code_to_entity[row.code] = data
+            if any(row.name.endswith(s) for s in ['区', '县', '市']):
+                self.trie.insert(row.name[:-1], data)
+            self.dist_to_city_prov[row.code] = (row.parent, prov_code)
+    
+    def clean_address(self, address_str, anchor_prov=None):
+        """清洗地址字符串"""
+        return self._dedupe_admin_names(self._normalize_address(address_str), anchor_prov)
+    
+    def _normalize_address(self, address_str):
+        """标准化地址字符串并移除噪音，clean_address与parse_many共用"""
+        if not isinstance(address_str, str) or not address_str.strip():
+            return ""
+        
+        # 标准化Unicode字符
+        addr = unicodedata.normalize('NFKC', address_str)
+        
+        # 移除括号内容和特殊字符
+        addr = _RE_CLEAN.sub('', addr)
+        return addr.replace('中国', '', 1).replace('市辖区', '')
+    
+    def _dedupe_admin_names(self, addr, anchor_prov=None):
+        """处理多省份冲突并去除重复的行政区划名称"""
+        # 处理多省份冲突
+        found = {p for _, p in self.prov_automaton.iter(addr)}
+        if len(found) > 1:
+            target = anchor_prov if anchor_prov and anchor_prov in found else max(found, key=addr.rfind)
+            idx = addr.rfind(target)
+            if idx != -1:
+                addr = addr[idx:]
+        
+        # 去重处理
+        prov_counts = Counter(p for _, p in self.prov_automaton.iter(addr))
+        for prov, count in prov_counts.items():
+            if count > 1:
+                addr = addr.replace(prov, "", count - 1)
+        
+        for cd in set(_RE_ADMIN_UNIT.findall(addr)):
+            count = addr.count(cd)
+            if count > 1:
+                addr = addr.replace(cd, "", count - 1)
+        
+        return addr
+    
+    def _regex_parse(self, address):
+        """使用正则表达式进行快速解析"""
+        prov_name, city_name, dist_name = None, None, None
+        
+        # 匹配省份
+        prov_matches = []
+        for pattern in self.province_patterns:
+            for match in pattern.finditer(address):
+                matched = match.group(1).strip()
+                mapped = self.address_mappings.get(matched, matched)
+                prov_matches.append(mapped)
+        
+        if prov_matches:
+            prov_name = prov_matches[-1]
+        
+        remaining = address
+        if prov_name and prov_name in address:
+            remaining = address[address.rfind(prov_name):]
+        
+        # 匹配城市
+        if prov_name and prov_name in self.municipalities:
+            city_name = prov_name
+        else:
+            city_matches = []
+            for pattern in self.city_patterns:
+                for match in pattern.finditer(remaining):
+                    city_matches.append(match.group(1).strip())
+            if city_matches:
+                city_name = city_matches[-1]
+        
+        # 匹配区县
+        dist_matches = []
+        for pattern in self.district_patterns:
+            for match in pattern.finditer(remaining):
+                dist_matches.append(match.group(1).strip())
+        if dist_matches:
+            dist_name = dist_matches[-1]
+        
+        # 返回结果，如果没有省份但有城市，标记需要补充省份
+        if not prov_name and city_name:
+            return ('__NEED_PROVINCE__', city_name, dist_name)
+        
+        return (prov_name, city_name, dist_name)
+    
+    def _smart_parse(self, address, context_prov_code=None):
+        """使用Trie树和决策评分的智能解析"""
+        if not address:
+            return None
+        
+        entities = self.trie.search_all_matches(address)
+        if not entities:
+            return None
+        
+        chains = self._generate_chains(entities)
+        if not chains:
+            return None
+        
+        # 评分并选择最佳链
+        best_chain = None
+        best_score = -float('inf')
+        
+        for chain in chains:
+            score = self._score_chain(chain, address, entities, context_prov_code)
+            if score > best_score:
+                best_score = score
+                best_chain = chain
+        
+        if not best_chain or best_score < 0:
+            return None
+        
+        # 构建结果
+        p_code, c_code, d_code = best_chain
+        prov = self.code_to_entity.get(p_code, {}).get('name')
+        city = self.code_to_entity.get(c_code, {}).get('name')
+        dist = self.code_to_entity.get(d_code, {}).get('name')
+        
+        # 处理直辖市
+        if prov in self.municipalities:
+            city = prov
+        
+        return (prov, city, dist)
+    
+    def _generate_chains(self, entities):
+        """生成所有可能的行政区划链"""
+        chains = set()
+        
+        districts = [e for e in entities if e['data']['level'] == 'district']
+        cities = [e for e in entities if e['data']['level'] == 'city']
+        provinces = [e for e in entities if e['data']['level'] == 'province']
+        
+        # 从区县构建完整链
+        for d in districts:
+            c_code, p_code = self.dist_to_city_prov.get(d['data']['code'], (None, None))
+            if p_code and c_code:
+                chains.add((p_code, c_code, d['data']['code']))
+        
+        # 从城市构建链
+        for c in cities:
+            p_code = c['data']['parent_code']
+            if p_code and not any(chain[1] == c['data']['code'] for chain in chains):
+                chains.add((p_code, c['data']['code'], None))
+        
+        # 添加仅省份的链
+        for p in provinces:
+            p_code = p['data']['code']
+            if not any(chain[0] == p_code for chain in chains):
+                chains.add((p_code, None, None))
+        
+        return list(chains)
+    
+    def _score_chain(self, chain, address, entities, ctx_prov_code):
+        """为行政区划链评分"""
+        p_code, c_code, d_code = chain
+        score = 0
+        
+        # 基础分：区县 > 城市 > 省份
+        if d_code:
+            score += 50
+        elif c_code:
+            score += 30
+        else:
+            score += 10
+        
+        # 上下文省份加分
+        if ctx_prov_code and p_code == ctx_prov_code:
+            score += 100
+        
+        # 文本覆盖率加分
+        chain_entities = [e for e in entities if e['data']['code'] in {p_code, c_code, d_code}]
+        if chain_entities:
+            texts = sorted(list({e['text'] for e in chain_entities}), key=len, reverse=True)
+            chain_text = "".join(texts)
+            coverage = len(chain_text) / len(address) if address else 0
+            score += coverage * 30
+        
+        # 冲突检测
+        remaining = address
+        for e in chain_entities:
+            remaining = remaining.replace(e['text'], '')
+        
+        # 检查剩余文本中是否有其他省份
+        p_name = self.code_to_entity.get(p_code, {}).get('name')
+        if any(prov != p_name for _, prov in self.prov_automaton.iter(remaining)):
+            score -= 200
+        
+        return score
+    
+    def _fix_missing_province(self, parsed):
+        """修复缺失的省份"""
+        if not parsed:
+            return None
+        
+        prov, city, dist = parsed
+        if prov == '__NEED_PROVINCE__' and city:
+            # 从城市映射查找省份
+            fixed_prov = self.city_to_province.get(city)
+            if fixed_prov:
+                return (fixed_prov, city, dist)
+        
+        return parsed
+    
+    def _lookup_hierarchy(self, prov, city, dist):
+        """沿省、市、区县逐级查找记录，结果同时供层级验证和地理编码使用"""
+        p_info = self.prov_by_name.get(prov) if prov else None
+        c_info = self.city_by_prov_and_name.get((p_info.code, city)) if p_info and city else None
+        d_info = self.district_by_city_and_name.get((c_info.code, dist)) if c_info and dist else None
+        return p_info, c_info, d_info
+    
+    def _is_valid_hierarchy(self, prov, city, dist, infos=None):
+        """验证行政区划层级是否合法"""
+        if not prov:
+            return True
+        
+        p_info, c_info, d_info = infos or self._lookup_hierarchy(prov, city, dist)
+        if p_info is None:
+            return False
+        if city and c_info is None:
+            return False
+        return not (city and dist and d_info is None)
+    
+    def _get_geodata(self, parsed, infos=None):
+        """获取地理编码数据"""
+        result = {
+            'province': None, 'city': None, 'district': None,
+            'province_code': None, 'city_code': None, 'district_code': None,
+            'province_lng': None, 'province_lat': None,
+            'city_lng': None, 'city_lat': None,
+            'district_lng': None, 'district_lat': None,
+            'address_detail': ''
+        }
+        
+        if not parsed:
+            return result
+        
+        prov, city, dist = parsed
+        result['province'] = prov
+        result['city'] = city
+        result['district'] = dist
+        
+        p_info, c_info, d_info = infos or self._lookup_hierarchy(prov, city, dist)
+        if p_info is not None:
+            result['province_code'] = p_info.code
+            result['province_lng'] = p_info.lng
+            result['province_lat'] = p_info.lat
+        if c_info is not None:
+            result['city_code'] = c_info.code
+            result['city_lng'] = c_info.lng
+            result['city_lat'] = c_info.lat
+        if d_info is not None:
+            result['district_code'] = d_info.code
+            result['district_lng'] = d_info.lng
+            result['district_lat'] = d_info.lat
+        
+        return result
+    
+    def parse(self, address_string):
+        """
+        解析单个地址字符串
+        
+        重复的地址直接命中缓存，返回的是缓存结果的副本。
+        
+        Args:
+            address_string (str): 需要解析的地址
+            
+        Returns:
+            dict: 包含解析结果的字典，包括省市区名称、代码和坐标
+        """
+        return dict(self._parse_cached(address_string))
+    
+    def cache_info(self):
+        """返回parse()结果缓存的命中统计"""
+        return self._parse_cached.cache_info()
+    
+    def _parse_impl(self, address_string):
+        """解析单个地址字符串（未缓存）"""
+        if not isinstance(address_string, str) or not address_string.strip():
+            return self._get_geodata(None)
+        
+        # 清洗地址
+        cleaned = self.clean_address(address_string)
+        return self._parse_cleaned(cleaned)
+    
+    def _parse_cleaned(self, cleaned):
+        """解析已清洗的地址"""
+        if not cleaned:
+            return self._get_geodata(None)
+        
+        # 第一步：正则快速解析
+        parsed = self._regex_parse(cleaned)
+        parsed = self._fix_missing_province(parsed)
+        
+        # 逐级查找一次，验证层级关系和获取地理编码共用查找结果
+        infos = self._lookup_hierarchy(*parsed) if parsed else None
+        if parsed and self._is_valid_hierarchy(*parsed, infos=infos):
+            result = self._get_geodata(parsed, infos)
+            # 计算详细地址
+            admin_text = "".join(filter(None, parsed))
+            result['address_detail'] = cleaned.replace(admin_text, '').strip()
+            return result
+        
+        # 第二步：智能解析
+        # 获取上下文省份代码
+        context_prov_code = None
+        if infos and infos[0] is not None:
+            context_prov_code = infos[0].code
+        
+        parsed = self._smart_parse(cleaned, context_prov_code)
+        result = self._get_geodata(parsed)
+        
+        # 计算详细地址
+        if parsed:
+            admin_text = "".join(filter(None, parsed))
+            result['address_detail'] = cleaned.replace(admin_text, '').strip()
+        else:
+            result['address_detail'] = cleaned
+        
+        return result
+    
+    def parse_many(self, addresses, num_workers=1):
+        """
+        批量解析地址并以DataFrame返回
+        
+        重复的地址只清洗、解析一次。单条解析很快，而启动进程池并向
+        每个进程传递解析器的开销较大，因此默认串行解析；指定num_workers
+        后使用多进程解析，每个工作进程只在启动时接收一次解析器。
+        
+        Args:
+            addresses (iterable): 地址序列
+            num_workers (int): 并行工作进程数，默认为1即串行；None表示CPU核心数-1
+            
+        Returns:
+            pandas.DataFrame: 每行对应一个输入地址，列与parse()返回的字典相同
+        """
+        import numpy as np
+        import pandas as pd
+        
+        columns = list(self._get_geodata(None))
+        codes, uniques = pd.factorize(pd.Series(list(addresses), dtype=object))
+        texts = [self._normalize_address(x) for x in uniques]
+        
+        if num_workers is None:
+            num_workers = max(1, multiprocessing.cpu_count() - 1)
+        
+        # 对于小批量，直接处理
+        if num_workers <= 1 or len(texts) < 100:
+            results = [self._parse_cleaned_text(text) for text in texts]
+        else:
+            chunk_size = max(1, len(texts) // (num_workers * 4))
+            with multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(self,)) as pool:
+                results = pool.map(_parse_cleaned_text_in_worker, texts, chunksize=chunk_size)
+        
+        # 按列组装结果：每列先在去重后的结果上取值，再按factorize编号一次展开到全部输入，
+        # 编号-1（缺失值）恰好取到末尾追加的空结果
+        results.append(self._get_geodata(None))
+        data = {col: np.array([r[col] for r in results], dtype=object)[codes] for col in columns}
+        return pd.DataFrame(data, columns=columns).infer_objects()
+    
+    def _parse_cleaned_text(self, text):
+        """解析已标准化的地址（用于parse_many）"""
+        return self._parse_cleaned(self._dedupe_admin_names(text))
+    
+    def parse_batch(self, addresses, num_workers=None):
+        """
+        批量解析地址
+        
+        Args:
+            addresses (list): 地址列表
+            num_workers (int): 并行工作进程数，默认为CPU核心数-1
+            
+        Returns:
+            list: 解析结果列表
+        """
+        if not addresses:
+            return []
+        
+        # 对于小批量，直接处理
+        if len(addresses) < 100:
+            return [self.parse(addr) for addr in tqdm(addresses, desc="解析地址")]
+        
+        # 使用多进程处理大批量
+        if num_workers is None:
+            num_workers = max(1, multiprocessing.cpu_count() - 1)
+        
+        # 分块处理
+        chunk_size = max(1, len(addresses) // (num_workers * 4))
+        chunks = [addresses[i:i + chunk_size] for i in range(0, len(addresses), chunk_size)]
+        
+        with multiprocessing.Pool(num_workers) as pool:
+            results = []
+            with tqdm(total=len(addresses), desc="批量解析地址") as pbar:
+                for chunk_results in pool.imap(self._parse_chunk, chunks):
+                    results.extend(chunk_results)
+                    pbar.update(len(chunk_results))
+        
+        return results
+    
+    def _parse_chunk(self, addresses):
+        """解析地址块（用于多进程）"""
+        return [self.parse(addr) for addr in addresses]
+
+
+# 多进程工作进程中的解析器实例，由_init_worker在进程启动时设置
+_worker_parser = None
+
+
+def _init_worker(parser):
+    """工作进程初始化，每个进程只接收一次解析器"""
+    global _worker_parser
+    _worker_parser = parser
+
+
+def _parse_cleaned_text_in_worker(text):
+    """在工作进程中解析已标准化的地址"""
+    return _worker_parser._parse_cleaned_text(text)
@@ -0,0 +1,27 @@
+"""
+构建随包发布的权威数据库
+
+发布前运行一次，从阿里云下载行政区划数据并生成
+addr_parser_cn/data/aliyun_regions.sqlite：
+
+    pip install -e .[build]
+    python build_data.py
+"""
+import argparse
+import os
+
+from addr_parser_cn import AdvancedAddressParser
+
+
+def main():
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addr_parser_cn', 'data')
+    arg_parser = argparse.ArgumentParser(description='下载阿里云数据并构建SQLite数据库')
+    arg_parser.add_argument('--data-dir', default=default_dir, help='数据库输出目录')
+    args = arg_parser.parse_args()
+
+    db_path = AdvancedAddressParser.build_database(args.data_dir)
+    print(f"数据库已生成: {db_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,16 +15,25 @@ setup(
     url='https://github.com/yourusername/addr_parser_cn',
     packages=find_packages(),
     package_data={
-        'addr_parser_cn': ['data/.gitkeep'],  # 确保data目录被创建
+        'addr_parser_cn': ['data/aliyun_regions.sqlite'],  # 预构建的权威数据库
     },
     include_package_data=True,
     install_requires=[
         'pandas>=1.0.0',
-        'requests>=2.20.0',
-        'tqdm>=4.50.0',
         'numpy>=1.18.0',
+        'pyahocorasick>=1.4.0',
     ],
     extras_require={
+        'build': [
+            'requests>=2.20.0',
+            'tqdm>=4.50.0',
+        ],
+        're2': [
+            'google-re2>=1.0',
+        ],
+        'orjson': [
+            'orjson>=3.0',
+        ],
         'dev': [
             'pytest>=6.0',
             'pytest-cov>=2.0',
@@ -0,0 +1,184 @@
+import json
+import os
+import pickle
+import re
+import shutil
+import sqlite3
+
+import pytest
+
+from addr_parser_cn import AdvancedAddressParser
+from addr_parser_cn import addr_parser_cn as apc
+
+
+SHIPPED_DB = os.path.join(os.path.dirname(apc.__file__), 'data', 'aliyun_regions.sqlite')
+
+SAMPLE_ADDRESSES = [
+    '浙江省杭州市西湖区文三路138号', '北京市朝阳区望京SOHO', '上海浦东新区陆家嘴环路1000号',
+    '广东深圳南山区科技园', '内蒙呼和浩特市回民区', '黑龙江哈尔滨', '杭州市西湖区',
+]
+
+
+@pytest.fixture(scope='module')
+def parser(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('data')
+    shutil.copy(SHIPPED_DB, data_dir)
+    return AdvancedAddressParser(data_dir=str(data_dir))
+
+
+def test_cleaning_patterns_match_stdlib_re_on_re2():
+    re2 = pytest.importorskip('re2')
+    # 代理区字符无法编码为UTF-8，RE2不接受
+    chars = [chr(i) for i in range(0x10000) if not 0xD800 <= i <= 0xDFFF]
+    samples = ['广东省\x0b深圳市南山区', '科技\u2028中路(1号)', '浙江省 杭州市【西湖】区'] + ['甲' + c + '乙' for c in chars]
+    for compiled in (apc._RE_CLEAN, apc._RE_ADMIN_UNIT):
+        std, fast = re.compile(compiled.pattern), re2.compile(compiled.pattern)
+        for text in samples:
+            assert fast.sub('', text) == std.sub('', text)
+            assert fast.findall(text) == std.findall(text)
+
+
+def test_clean_address_strips_unicode_whitespace(parser):
+    assert parser.clean_address('广东省\x0b深圳市南山区') == '广东省深圳市南山区'
+    assert parser.parse('广东省深圳市南山区科技\u2028中路1号')['address_detail'].endswith('科技中路1号')
+
+
+def test_parse_returns_copy_of_cached_result(parser):
+    address = '浙江省杭州市西湖区文三路138号东方通信大厦'
+    first = parser.parse(address)
+    expected = dict(first)
+    first['province'] = '被修改'
+    first.clear()
+
+    hits = parser.cache_info().hits
+    assert parser.parse(address) == expected
+    assert parser.cache_info().hits == hits + 1
+
+
+def test_parse_cache_survives_pickling(parser):
+    parser.parse('北京市朝阳区望京SOHO')
+    restored = pickle.loads(pickle.dumps(parser))
+    assert restored.cache_info().currsize == 0
+    for address in SAMPLE_ADDRESSES:
+        assert restored.parse(address) == parser.parse(address)
+    restored.parse(SAMPLE_ADDRESSES[0])
+    assert restored.cache_info().hits == 1
+    assert restored.cache_info().currsize == len(SAMPLE_ADDRESSES)
+
+
+def _normalize_missing(value):
+    return None if isinstance(value, float) and value != value else value
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_parse_many_matches_parse(parser, num_workers):
+    districts = sorted({name for _, name in parser.district_by_city_and_name})[:150]
+    addresses = [d + '人民路1号' for d in districts] + [
+        '浙江省杭州市西湖区文三路138号', '广东省\x0b深圳市南山区', '科技 中路(1号)',
+        None, float('nan'), '', '   ', 123, '浙江省杭州市西湖区文三路138号', None,
+    ]
+    df = parser.parse_many(addresses, num_workers=num_workers)
+    assert len(df) == len(addresses)
+    for address, row in zip(addresses, df.to_dict('records')):
+        expected = parser.parse(address)
+        assert {k: _normalize_missing(v) for k, v in row.items()} == expected
+
+
+def test_index_cache_pickling_error_is_ignored(tmp_path, monkeypatch):
+    shutil.copy(SHIPPED_DB, tmp_path)
+
+    def fail_dump(*args, **kwargs):
+        raise apc.pickle.PicklingError('cannot pickle')
+
+    monkeypatch.setattr(apc.pickle, 'dump', fail_dump)
+    parser = AdvancedAddressParser(data_dir=str(tmp_path))
+    assert parser.parse('浙江省杭州市')['city_code'] == '330100'
+    assert sorted(os.listdir(tmp_path)) == ['aliyun_regions.sqlite']
+
+
+def _loaded_from_cache(data_dir, capsys):
+    capsys.readouterr()
+    parser = AdvancedAddressParser(data_dir=str(data_dir))
+    return parser, '从缓存加载' in capsys.readouterr().out
+
+
+def test_index_cache_matches_full_rebuild(tmp_path, capsys):
+    shutil.copy(SHIPPED_DB, tmp_path)
+    rebuilt, from_cache = _loaded_from_cache(tmp_path, capsys)
+    assert not from_cache
+    assert os.path.exists(rebuilt.index_cache_path)
+
+    cached, from_cache = _loaded_from_cache(tmp_path, capsys)
+    assert from_cache
+    for address in SAMPLE_ADDRESSES:
+        assert cached.parse(address) == rebuilt.parse(address)
+
+
+def test_index_cache_older_than_database_is_rejected(tmp_path, capsys):
+    shutil.copy(SHIPPED_DB, tmp_path)
+    parser, _ = _loaded_from_cache(tmp_path, capsys)
+    cache_mtime = os.path.getmtime(parser.index_cache_path)
+    os.utime(parser.aliyun_db_path, (cache_mtime + 10, cache_mtime + 10))
+
+    _, from_cache = _loaded_from_cache(tmp_path, capsys)
+    assert not from_cache
+
+
+def test_index_cache_with_other_version_is_rejected(tmp_path, capsys, monkeypatch):
+    shutil.copy(SHIPPED_DB, tmp_path)
+    _loaded_from_cache(tmp_path, capsys)
+
+    monkeypatch.setattr(apc, '_INDEX_CACHE_VERSION', apc._INDEX_CACHE_VERSION + 1)
+    _, from_cache = _loaded_from_cache(tmp_path, capsys)
+    assert not from_cache
+
+
+def test_missing_database_raises_without_download(tmp_path, monkeypatch):
+    def fail_download(self):
+        raise AssertionError('parser must not download data')
+
+    monkeypatch.setattr(AdvancedAddressParser, '_download_raw_data', fail_download)
+    data_dir = tmp_path / 'missing'
+    with pytest.raises(FileNotFoundError):
+        AdvancedAddressParser(data_dir=str(data_dir))
+    assert not data_dir.exists()
+
+
+def _feature(adcode, name, level, center, parent):
+    return {'type': 'Feature', 'properties': {
+        'adcode': adcode, 'name': name, 'level': level, 'center': center,
+        'parent': {'adcode': parent} if parent else None}}
+
+
+def test_build_database_from_local_geojson(tmp_path, monkeypatch):
+    def fail_download(self):
+        raise AssertionError('raw data is already present')
+
+    monkeypatch.setattr(AdvancedAddressParser, '_download_raw_data', fail_download)
+    features = [
+        _feature(100000, '中华人民共和国', 'country', [116.3, 39.9], None),
+        _feature(330000, '浙江省', 'province', [120.15, 30.28], 100000),
+        _feature(330100, '杭州市', 'city', [120.15, 30.28], 330000),
+        _feature(330106, '西湖区', 'district', [120.13, 30.26], 330100),
+        _feature(110000, '北京市', 'province', [116.40, 39.90], 100000),
+        _feature(110101, '东城区', 'district', [116.42, 39.92], 110000),
+    ]
+    with open(tmp_path / 'aliyun_raw_data.json', 'w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False)
+
+    db_path = AdvancedAddressParser.build_database(str(tmp_path))
+    assert db_path == str(tmp_path / 'aliyun_regions.sqlite')
+
+    parser = AdvancedAddressParser(data_dir=str(tmp_path))
+    result = parser.parse('浙江省杭州市西湖区文三路138号')
+    assert (result['province_code'], result['city_code'], result['district_code']) == ('330000', '330100', '330106')
+    assert result['district_lng'] == 120.13
+    assert result['address_detail'] == '文三路138号'
+
+    # 直辖市的区县直接挂在省级代码下
+    con = sqlite3.connect(db_path)
+    try:
+        row = con.execute("SELECT cityCode, provinceCode FROM districts WHERE code = '110101'").fetchone()
+    finally:
+        con.close()
+    assert row == ('110000', '110000')